@@ -19,9 +19,44 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
+
 import tensorflow as tf
 
 
+# Constants of the space discretization, which depend only on the coordinate
+# grid. They are computed once per step instead of every time the time marching
+# scheme constructs the discretized equation.
+_GridGeometry = collections.namedtuple(
+    '_GridGeometry',
+    [
+        # Reciprocals of the forward, backward and total deltas at the inner
+        # grid points. Note that sum_deltas = 2 * central_deltas.
+        'inv_forward_deltas',
+        'inv_backward_deltas',
+        'inv_sum_deltas',
+        # `_BoundaryGeometry` of the lower and the upper boundary.
+        'lower_boundary',
+        'upper_boundary'
+    ])
+
+# Factors entering the discretized boundary conditions. Here `dx0` and `dx1`
+# are the deltas between the boundary point and the next two points of the
+# grid, see `_discretize_boundary_conditions`.
+_BoundaryGeometry = collections.namedtuple(
+    '_BoundaryGeometry',
+    [
+        # dx1 * (2 * dx0 + dx1)
+        'beta_factor',
+        # dx0 * dx1 * (dx0 + dx1)
+        'alpha_factor',
+        # (dx0 + dx1)**2
+        'xi1_factor',
+        # dx0**2
+        'xi2_factor'
+    ])
+
+
 def parabolic_equation_step(
     time,
     next_time,
@@ -32,6 +67,10 @@ def parabolic_equation_step(
     first_order_coeff_fn,
     zeroth_order_coeff_fn,
     time_marching_scheme,
+    coord_grid_deltas=None,
+    uniform_grid=False,
+    time_independent_coefficients=False,
+    compute_dtype=None,
     dtype=None,
     name=None):
   """Performs one step of the parabolic PDE solver.
@@ -136,6 +175,35 @@ def parabolic_equation_step(
       The callable should return a `Tensor` of the same shape and `dtype` a
       `value_grid` and represents an approximate solution of the PDE after one
       iteraton.
+    coord_grid_deltas: Optional rank 1 real `Tensor` of shape `[d_1 - 1]`. The
+      differences between the consecutive points of `coord_grid[0]`. The grid
+      does not change from step to step, so the caller may compute the deltas
+      once and pass them to every step. A `ValueError` is raised if the shape
+      is statically known to be incompatible with `coord_grid`.
+      Default value: None which means the deltas are computed from
+      `coord_grid`.
+    uniform_grid: Python bool. Whether `coord_grid` is uniform, i.e. all the
+      deltas between its consecutive points are equal. If `True`, the grid
+      geometry reduces to scalars computed from the first delta, and the
+      discretization does not read any per-point deltas. The deltas are
+      checked to be equal up to a relative tolerance of `1e-3`, and an
+      `InvalidArgumentError` is raised otherwise.
+      Default value: False.
+    time_independent_coefficients: Python bool. Whether the second, first and
+      zeroth order coefficients do not depend on time. If `True`, the
+      coefficients are evaluated once per step instead of every time
+      `time_marching_scheme` constructs the discretized equation. The boundary
+      conditions are still evaluated at every time requested by the scheme.
+      Default value: False.
+    compute_dtype: Optional dtype in which the step is computed. The times, the
+      grids, the PDE coefficients and the boundary conditions are cast to this
+      dtype, and the result is cast back to the dtype of `value_grid`. E.g.
+      `tf.float32` halves the memory traffic of a `tf.float64` solver at the
+      cost of precision. Note that the coefficient and boundary condition
+      callables then receive `t` and `coord_grid` of `compute_dtype`, so any
+      `Tensor`s they combine with these arguments should be of the same
+      dtype. The values they return are cast to `compute_dtype`.
+      Default value: None which means the step is computed in `dtype`.
     dtype: The dtype to use.
     name: The name to give to the ops.
       Default value: None which means `parabolic_equation_step` is used.
@@ -147,30 +215,59 @@ def parabolic_equation_step(
     as`value_grid` and represents an approximate solution of the equation after
     one iteration.
   """
-  with tf.compat.v1.name_scope(name, 'parabolic_equation_step',
-                               [time, next_time, coord_grid, value_grid]):
-    time = tf.convert_to_tensor(time, dtype=dtype, name='time')
-    next_time = tf.convert_to_tensor(next_time, dtype=dtype, name='next_time')
-    coord_grid = [tf.convert_to_tensor(x, dtype=dtype,
-                                       name='coord_grid_axis_{}'.format(ind))
-                  for ind, x in enumerate(coord_grid)]
-    value_grid = tf.convert_to_tensor(value_grid, dtype=dtype,
-                                      name='value_grid')
-
-    first_order_coeff_fn = first_order_coeff_fn or (lambda *args: [0.0])
-    zeroth_order_coeff_fn = zeroth_order_coeff_fn or (lambda *args: 0.0)
+  with tf.name_scope(name or 'parabolic_equation_step'):
+    time = tf.convert_to_tensor(time, dtype=dtype)
+    next_time = tf.convert_to_tensor(next_time, dtype=dtype)
+    coord_grid = tf.nest.map_structure(
+        lambda x: tf.convert_to_tensor(x, dtype=dtype), coord_grid)
+    value_grid = tf.convert_to_tensor(value_grid, dtype=dtype)
+    if coord_grid_deltas is not None:
+      coord_grid_deltas = tf.convert_to_tensor(coord_grid_deltas,
+                                               dtype=coord_grid[0].dtype)
+    output_coord_grid, output_dtype = coord_grid, value_grid.dtype
+    if compute_dtype is not None:
+      time, next_time, value_grid = (
+          tf.cast(x, compute_dtype) for x in (time, next_time, value_grid))
+      coord_grid = tf.nest.map_structure(
+          lambda x: tf.cast(x, compute_dtype), coord_grid)
+      if coord_grid_deltas is not None:
+        coord_grid_deltas = tf.cast(coord_grid_deltas, compute_dtype)
+      # The callbacks may return `Tensor`s of the dtype of `value_grid`.
+      second_order_coeff_fn, first_order_coeff_fn, zeroth_order_coeff_fn = (
+          _cast_results(fn, compute_dtype) for fn in (
+              second_order_coeff_fn, first_order_coeff_fn,
+              zeroth_order_coeff_fn))
+      boundary_conditions = [
+          (_cast_results(lower_fn, compute_dtype),
+           _cast_results(upper_fn, compute_dtype))
+          for lower_fn, upper_fn in boundary_conditions]
 
     inner_grid_in = value_grid[..., 1:-1]
-    coord_grid_deltas = coord_grid[0][1:] - coord_grid[0][:-1]
+    if coord_grid_deltas is None:
+      coord_grid_deltas = coord_grid[0][1:] - coord_grid[0][:-1]
+    else:
+      num_grid_points = tf.compat.dimension_value(coord_grid[0].shape[-1])
+      if num_grid_points is not None:
+        coord_grid_deltas.shape.assert_is_compatible_with(
+            [num_grid_points - 1])
+    grid_geometry = _grid_geometry(coord_grid_deltas, uniform_grid)
+
+    def pde_coeffs_fn(t):
+      return _prepare_all_pde_coeffs(second_order_coeff_fn,
+                                     first_order_coeff_fn,
+                                     zeroth_order_coeff_fn,
+                                     coord_grid, value_grid, t)
+    if time_independent_coefficients:
+      # Evaluate the coefficients once and reuse them at all times.
+      pde_coeffs = pde_coeffs_fn(time)
+      pde_coeffs_fn = lambda _: pde_coeffs
 
     def equation_params_fn(t):
       return _construct_space_discretized_eqn_params(coord_grid,
-                                                     coord_grid_deltas,
+                                                     grid_geometry,
                                                      value_grid,
                                                      boundary_conditions,
-                                                     second_order_coeff_fn,
-                                                     first_order_coeff_fn,
-                                                     zeroth_order_coeff_fn,
+                                                     pde_coeffs_fn(t),
                                                      t)
     inner_grid_out = time_marching_scheme(
         value_grid=inner_grid_in,
@@ -181,17 +278,78 @@ def parabolic_equation_step(
 
     updated_value_grid = _apply_boundary_conditions_after_step(
         inner_grid_out, boundary_conditions,
-        coord_grid, coord_grid_deltas, next_time)
-    return coord_grid, updated_value_grid
+        coord_grid, grid_geometry, next_time)
+    return output_coord_grid, tf.cast(updated_value_grid, output_dtype)
+
+
+def _cast_results(fn, dtype):
+  """Wraps `fn` so that the `Tensor`s it returns are cast to `dtype`."""
+  if fn is None:
+    return None
+  def cast_fn(*args):
+    return tf.nest.map_structure(
+        lambda x: tf.cast(x, dtype) if tf.is_tensor(x) else x, fn(*args))
+  return cast_fn
+
+
+def _grid_geometry(coord_grid_deltas, uniform_grid):
+  """Computes the grid-dependent constants of the space discretization."""
+  if uniform_grid:
+    # All the deltas are equal to `delta`, so that the reciprocals of the
+    # forward and backward deltas are `1 / delta`, and the reciprocal of the
+    # total delta is `1 / (2 * delta)`. These scalars broadcast against the
+    # PDE coefficients. Since the per-point deltas are not used, check that
+    # the grid is indeed uniform instead of silently returning wrong results.
+    delta = coord_grid_deltas[0]
+    assert_uniform = tf.debugging.assert_near(
+        coord_grid_deltas, delta, rtol=1e-3,
+        message='`uniform_grid` is True but `coord_grid` is not uniform.')
+    with tf.control_dependencies([assert_uniform]):
+      delta = tf.identity(delta)
+    inv_delta = 1 / delta
+    boundary_geometry = _boundary_geometry(delta, delta)
+    return _GridGeometry(
+        inv_forward_deltas=inv_delta,
+        inv_backward_deltas=inv_delta,
+        inv_sum_deltas=inv_delta / 2,
+        lower_boundary=boundary_geometry,
+        upper_boundary=boundary_geometry)
+  forward_deltas = coord_grid_deltas[1:]
+  backward_deltas = coord_grid_deltas[:-1]
+  return _GridGeometry(
+      inv_forward_deltas=1 / forward_deltas,
+      inv_backward_deltas=1 / backward_deltas,
+      inv_sum_deltas=1 / (forward_deltas + backward_deltas),
+      lower_boundary=_boundary_geometry(coord_grid_deltas[0],
+                                        coord_grid_deltas[1]),
+      upper_boundary=_boundary_geometry(coord_grid_deltas[-1],
+                                        coord_grid_deltas[-2]))
+
+
+def _boundary_geometry(dx0, dx1):
+  """Computes the factors entering the discretized boundary conditions."""
+  return _BoundaryGeometry(
+      beta_factor=dx1 * (2 * dx0 + dx1),
+      alpha_factor=dx0 * dx1 * (dx0 + dx1),
+      xi1_factor=(dx0 + dx1) * (dx0 + dx1),
+      xi2_factor=dx0 * dx0)
+
+
+def _xla_compile(fn):
+  """Compiles `fn` with XLA if the installed TensorFlow supports it."""
+  # `jit_compile` is only available in TensorFlow 2.5 and later. With older
+  # versions the function is run as is, which gives the same results.
+  try:
+    return tf.function(fn, jit_compile=True, autograph=False)
+  except (AttributeError, TypeError):
+    return fn
 
 
 def _construct_space_discretized_eqn_params(coord_grid,
-                                            coord_grid_deltas,
+                                            grid_geometry,
                                             value_grid,
                                             boundary_conditions,
-                                            second_order_coeff_fn,
-                                            first_order_coeff_fn,
-                                            zeroth_order_coeff_fn,
+                                            pde_coeffs,
                                             t):
   """Constructs the tridiagonal matrix and the inhomogeneous term."""
   # The space-discretized PDE has the form dv/dt = A(t) v(t) + b(t), where
@@ -201,46 +359,75 @@ def _construct_space_discretized_eqn_params(coord_grid,
   # A(t) e.g. in [Forsyth, Vetzal][1] (we denote `beta` and `gamma` from the
   # paper as `dx_coef` and `dxdx_coef`).
 
-  # Get forward, backward and total differences.
-  forward_deltas = coord_grid_deltas[1:]
-  backward_deltas = coord_grid_deltas[:-1]
-  # Note that sum_deltas = 2 * central_deltas.
-  sum_deltas = forward_deltas + backward_deltas
+  second_order_coeff, first_order_coeff, zeroth_order_coeff = pde_coeffs
+
+  # Retrieve the boundary conditions in the form alpha V + beta V' = gamma.
+  lower_boundary, upper_boundary = _evaluate_boundary_conditions(
+      boundary_conditions, t, coord_grid, value_grid.dtype)
+
+  return _discretize_equation(grid_geometry, second_order_coeff,
+                              first_order_coeff, zeroth_order_coeff,
+                              lower_boundary, upper_boundary,
+                              _inner_grid_shape(value_grid))
+
+
+@_xla_compile
+def _discretize_equation(grid_geometry, second_order_coeff, first_order_coeff,
+                         zeroth_order_coeff, lower_boundary, upper_boundary,
+                         inner_grid_shape):
+  """Constructs the tridiagonal matrix and the inhomogeneous term."""
+  # The user-supplied callbacks are evaluated by the caller, so that this
+  # function only receives tensors and Python constants. XLA fuses the
+  # construction of the diagonals with the boundary corrections, so the
+  # uncorrected diagonals are never materialized.
+  diagonal, upper_diagonal, lower_diagonal = _discretize_space(
+      grid_geometry, second_order_coeff, first_order_coeff,
+      zeroth_order_coeff, inner_grid_shape)
+  return _apply_boundary_conditions_to_discretized_equation(
+      grid_geometry, diagonal, upper_diagonal, lower_diagonal,
+      lower_boundary, upper_boundary)
+
+
+def _discretize_space(grid_geometry, second_order_coeff, first_order_coeff,
+                      zeroth_order_coeff, inner_grid_shape):
+  """Constructs the tridiagonal matrix from the PDE coefficients."""
+  # The coefficients are broadcast implicitly, and only the resulting diagonals
+  # are broadcast to the shape of the inner part of the value grid.
 
   # 3-diagonal matrix construction. See matrix `M` in [Forsyth, Vetzal][1].
   #  The `tridiagonal` matrix is of shape
   # `[value_dim, 3, num_grid_points]`.
 
-  # Get the PDE coefficients and broadcast them to the shape of value grid.
-  second_order_coeff = _prepare_pde_coeffs(
-      second_order_coeff_fn(t, coord_grid)[0][0], value_grid)
-  first_order_coeff = _prepare_pde_coeffs(
-      first_order_coeff_fn(t, coord_grid)[0], value_grid)
-  zeroth_order_coeff = _prepare_pde_coeffs(zeroth_order_coeff_fn(t, coord_grid),
-                                           value_grid)
-
   # Here `dxdx_coef` is coming from the discretization of `V_{xx}` and
-  # `dx_coef` is from discretization of `V_{x}`.
-  temp = 2 * second_order_coeff / sum_deltas
-  dxdx_coef_1 = temp / forward_deltas
-  dxdx_coef_2 = temp / backward_deltas
-  dx_coef = first_order_coeff / sum_deltas
+  # `dx_coef` is from discretization of `V_{x}`. Both carry the common factor
+  # `1 / sum_deltas`, which is applied once per diagonal, so that e.g.
+  # `upper_diagonal = -(b + 2 a / forward_deltas) / sum_deltas` maps to a
+  # fused multiply-add followed by a multiplication.
+  two_second_order_coeff = 2 * second_order_coeff
+  dxdx_coef_1 = two_second_order_coeff * grid_geometry.inv_forward_deltas
+  dxdx_coef_2 = two_second_order_coeff * grid_geometry.inv_backward_deltas
 
   # The 3 main diagonals are constructed below. Note that all the diagonals
   # are of the same length
-  upper_diagonal = (-dx_coef - dxdx_coef_1)
-  lower_diagonal = (dx_coef - dxdx_coef_2)
-  diagonal = -zeroth_order_coeff - upper_diagonal - lower_diagonal
-
-  return _apply_boundary_conditions_to_discretized_equation(
-      boundary_conditions,
-      coord_grid, coord_grid_deltas,
-      diagonal, upper_diagonal, lower_diagonal, t)
+  if first_order_coeff is None:
+    upper_diagonal = -dxdx_coef_1 * grid_geometry.inv_sum_deltas
+    lower_diagonal = -dxdx_coef_2 * grid_geometry.inv_sum_deltas
+  else:
+    upper_diagonal = (
+        -(first_order_coeff + dxdx_coef_1) * grid_geometry.inv_sum_deltas)
+    lower_diagonal = (
+        (first_order_coeff - dxdx_coef_2) * grid_geometry.inv_sum_deltas)
+  diagonal = -upper_diagonal - lower_diagonal
+  if zeroth_order_coeff is not None:
+    diagonal -= zeroth_order_coeff
+  return (tf.broadcast_to(diagonal, inner_grid_shape),
+          tf.broadcast_to(upper_diagonal, inner_grid_shape),
+          tf.broadcast_to(lower_diagonal, inner_grid_shape))
 
 
 def _apply_boundary_conditions_to_discretized_equation(
-    boundary_conditions,
-    coord_grid, coord_grid_deltas, diagonal, upper_diagonal, lower_diagonal, t):
+    grid_geometry, diagonal, upper_diagonal, lower_diagonal,
+    lower_boundary, upper_boundary):
   """Updates space-discretized equation according to boundary conditions."""
   # Without taking into account the boundary conditions, the space-discretized
   # PDE has the form dv/dt = A(t) v(t), where v(t) is V(t, x) discretized by
@@ -249,10 +436,8 @@ def _apply_boundary_conditions_to_discretized_equation(
   # the inhomogeneous term, so the equation becomes dv/dt = A'(t) v(t) + b(t),
   # where A' is the modified matrix, and b is a vector.
   # This function receives A and returns A' and b.
-
-  # Retrieve the boundary conditions in the form alpha V + beta V' = gamma.
-  alpha_l, beta_l, gamma_l = boundary_conditions[0][0](t, coord_grid)
-  alpha_u, beta_u, gamma_u = boundary_conditions[0][1](t, coord_grid)
+  alpha_l, beta_l, gamma_l = lower_boundary
+  alpha_u, beta_u, gamma_u = upper_boundary
 
   if beta_l is None and beta_u is None:
     # Dirichlet conditions on both boundaries. In this case there are no
@@ -267,17 +452,13 @@ def _apply_boundary_conditions_to_discretized_equation(
   # Convert the boundary conditions into the form v0 = xi1 v1 + xi2 v2 + eta,
   # and calculate corrections to the tridiagonal matrix and the inhomogeneous
   # term.
-  xi1, xi2, eta = _discretize_boundary_conditions(coord_grid_deltas[0],
-                                                  coord_grid_deltas[1],
-                                                  alpha_l,
-                                                  beta_l, gamma_l)
+  xi1, xi2, eta = _discretize_boundary_conditions(
+      grid_geometry.lower_boundary, alpha_l, beta_l, gamma_l)
   diag_first_correction = lower_diagonal[..., 0] * xi1
   upper_diag_correction = lower_diagonal[..., 0] * xi2
   first_inhomog_element = lower_diagonal[..., 0] * eta
-  xi1, xi2, eta = _discretize_boundary_conditions(coord_grid_deltas[-1],
-                                                  coord_grid_deltas[-2],
-                                                  alpha_u,
-                                                  beta_u, gamma_u)
+  xi1, xi2, eta = _discretize_boundary_conditions(
+      grid_geometry.upper_boundary, alpha_u, beta_u, gamma_u)
   diag_last_correction = upper_diagonal[..., -1] * xi1
   lower_diag_correction = upper_diagonal[..., -1] * xi2
   last_inhomog_element = upper_diagonal[..., -1] * eta
@@ -297,47 +478,109 @@ def _apply_boundary_conditions_to_discretized_equation(
 
 def _apply_boundary_conditions_after_step(
     inner_grid_out, boundary_conditions,
-    coord_grid, coord_grid_deltas, time_after_step):
+    coord_grid, grid_geometry, time_after_step):
   """Calculates and appends boundary values after making a step."""
   # After we've updated the values in the inner part of the grid according to
   # the PDE, we append the boundary values calculated using the boundary
   # conditions.
+  lower_boundary, upper_boundary = _evaluate_boundary_conditions(
+      boundary_conditions, time_after_step, coord_grid, inner_grid_out.dtype)
+  return _append_boundary_values(grid_geometry, inner_grid_out,
+                                 lower_boundary, upper_boundary)
+
+
+@_xla_compile
+def _append_boundary_values(grid_geometry, inner_grid_out,
+                            lower_boundary, upper_boundary):
+  """Computes the boundary values and appends them to the inner grid."""
   # This is done using the discretized form of the boundary conditions,
   # v0 = xi1 v1 + xi2 v2 + eta.
-
-  alpha, beta, gamma = boundary_conditions[0][0](time_after_step,
-                                                 coord_grid[0][0])
-  xi1, xi2, eta = _discretize_boundary_conditions(coord_grid_deltas[0],
-                                                  coord_grid_deltas[1],
-                                                  alpha, beta, gamma)
+  # XLA fuses the computation of the boundary values with the concatenation
+  # below, so the updated grid is written in a single pass.
+  alpha, beta, gamma = lower_boundary
+  xi1, xi2, eta = _discretize_boundary_conditions(
+      grid_geometry.lower_boundary, alpha, beta, gamma)
   first_value = (
       xi1 * inner_grid_out[..., 0] + xi2 * inner_grid_out[..., 1] + eta)
-  alpha, beta, gamma = boundary_conditions[0][1](time_after_step,
-                                                 coord_grid)
-  xi1, xi2, eta = _discretize_boundary_conditions(coord_grid_deltas[-1],
-                                                  coord_grid_deltas[-2],
-                                                  alpha, beta, gamma)
+  alpha, beta, gamma = upper_boundary
+  xi1, xi2, eta = _discretize_boundary_conditions(
+      grid_geometry.upper_boundary, alpha, beta, gamma)
   last_value = (
       xi1 * inner_grid_out[..., -1] + xi2 * inner_grid_out[..., -2] + eta)
   return _append_first_and_last(first_value, inner_grid_out, last_value)
 
 
+def _prepare_all_pde_coeffs(second_order_coeff_fn, first_order_coeff_fn,
+                            zeroth_order_coeff_fn, coord_grid, value_grid, t):
+  """Evaluates the PDE coefficients and trims them on the boundaries."""
+  # Absent first and zeroth order terms are kept as `None`, so that the
+  # corresponding computations are skipped altogether.
+  second_order_coeff = _prepare_pde_coeffs(
+      second_order_coeff_fn(t, coord_grid)[0][0], value_grid)
+  first_order_coeff = None
+  if first_order_coeff_fn is not None:
+    first_order_coeff = _prepare_pde_coeffs(
+        first_order_coeff_fn(t, coord_grid)[0], value_grid)
+  zeroth_order_coeff = None
+  if zeroth_order_coeff_fn is not None:
+    zeroth_order_coeff = _prepare_pde_coeffs(
+        zeroth_order_coeff_fn(t, coord_grid), value_grid)
+  return second_order_coeff, first_order_coeff, zeroth_order_coeff
+
+
+def _inner_grid_shape(value_grid):
+  """Returns the shape of `value_grid[..., 1:-1]`."""
+  # A static shape is returned whenever it is known, so that XLA can specialize
+  # the compiled functions to it instead of treating it as a runtime value.
+  if value_grid.shape.is_fully_defined():
+    shape = value_grid.shape.as_list()
+    return shape[:-1] + [shape[-1] - 2]
+  value_grid_shape = tf.shape(value_grid)
+  return tf.concat([value_grid_shape[:-1], value_grid_shape[-1:] - 2], axis=0)
+
+
 def _prepare_pde_coeffs(raw_coeffs, value_grid):
   """Prepares values received from second_order_coeff_fn and similar."""
-  dtype = value_grid.dtype
-  coeffs = tf.convert_to_tensor(raw_coeffs, dtype=dtype)
-
-  broadcast_shape = tf.shape(value_grid)
-  coeffs = tf.broadcast_to(coeffs, broadcast_shape)
+  if raw_coeffs is None:
+    return None
+  coeffs = tf.convert_to_tensor(raw_coeffs, dtype=value_grid.dtype)
+
+  # The coefficients are not broadcast to the shape of `value_grid`: this
+  # happens implicitly when the diagonals are constructed. Coefficients that
+  # are constant along the spatial axis need no trimming.
+  rank = coeffs.shape.rank
+  if rank == 0:
+    return coeffs
+  if rank is None or tf.compat.dimension_value(coeffs.shape[-1]) is None:
+    # The static shape doesn't tell whether the coefficients vary along the
+    # spatial axis, so broadcast them to the shape of `value_grid` first.
+    coeffs = tf.broadcast_to(coeffs, tf.shape(value_grid))
+  elif coeffs.shape[-1] == 1:
+    return coeffs
 
   # Trim coefficients on boundaries. We don't need them, because the boundary
   # values don't satisfy the PDE, they are restored using boundary conditions
   # instead.
-  coeffs = coeffs[..., 1:-1]
-  return coeffs
+  return coeffs[..., 1:-1]
+
+
+def _evaluate_boundary_conditions(boundary_conditions, t, coord_grid, dtype):
+  """Evaluates the lower and upper boundary conditions at time `t`."""
+  lower_boundary = _prepare_boundary_conditions(
+      boundary_conditions[0][0](t, coord_grid), dtype)
+  upper_boundary = _prepare_boundary_conditions(
+      boundary_conditions[0][1](t, coord_grid), dtype)
+  return lower_boundary, upper_boundary
+
+
+def _prepare_boundary_conditions(raw_boundary_conditions, dtype):
+  """Converts the values of `alpha`, `beta` and `gamma` to `dtype`."""
+  return tuple(
+      None if value is None else tf.convert_to_tensor(value, dtype=dtype)
+      for value in raw_boundary_conditions)
 
 
-def _discretize_boundary_conditions(dx0, dx1, alpha, beta, gamma):
+def _discretize_boundary_conditions(boundary_geometry, alpha, beta, gamma):
   """Discretizes boundary conditions."""
   # Converts a boundary condition given as alpha V + beta V_n = gamma,
   # where V_n is the derivative w.r.t. the normal to the boundary into
@@ -346,20 +589,24 @@ def _discretize_boundary_conditions(dx0, dx1, alpha, beta, gamma):
   # on the next two points on the grid.
   # The expressions are exactly the same for both boundaries.
 
+  if alpha is None and beta is None:
+    raise ValueError(
+        "Invalid boundary conditions: alpha and beta can't both be None.")
+  # An absent term is the same as a zero coefficient. The expressions below
+  # then hold for all kinds of conditions, e.g. for a Dirichlet condition
+  # (beta = 0) they give xi1 = xi2 = 0 and eta = gamma / alpha.
+  if alpha is None:
+    alpha = 0
   if beta is None:
-    # Dirichlet condition.
-    if alpha is None:
-      raise ValueError(
-          "Invalid boundary conditions: alpha and beta can't both be None.")
-    zeros = tf.zeros_like(gamma)
-    return zeros, zeros, gamma / alpha
-
-  denom = beta * dx1 * (2 * dx0 + dx1)
-  if alpha is not None:
-    denom += alpha * dx0 * dx1 * (dx0 + dx1)
-  xi1 = beta * (dx0 + dx1) * (dx0 + dx1) / denom
-  xi2 = -beta * dx0 * dx0 / denom
-  eta = gamma * dx0 * dx1 * (dx0 + dx1) / denom
+    beta = 0
+
+  # The grid-dependent factors are precomputed in `boundary_geometry`, see
+  # `_boundary_geometry`.
+  denom = (beta * boundary_geometry.beta_factor
+           + alpha * boundary_geometry.alpha_factor)
+  xi1 = beta * boundary_geometry.xi1_factor / denom
+  xi2 = -beta * boundary_geometry.xi2_factor / denom
+  eta = gamma * boundary_geometry.alpha_factor / denom
   return xi1, xi2, eta
 
 
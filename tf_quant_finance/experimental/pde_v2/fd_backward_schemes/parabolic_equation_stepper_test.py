@@ -15,11 +15,14 @@ import tensorflow as tf
 from tf_quant_finance.experimental.pde_v2 import fd_solvers
 from tf_quant_finance.experimental.pde_v2.boundary_conditions import dirichlet
 from tf_quant_finance.experimental.pde_v2.boundary_conditions import neumann
+from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.crank_nicolson import crank_nicolson_scheme
 from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.crank_nicolson import crank_nicolson_step
 from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.explicit import explicit_step
+from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.extrapolation import extrapolation_scheme
 from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.extrapolation import extrapolation_step
 from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.implicit import implicit_step
 from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.oscillation_damped_crank_nicolson import crank_nicolson_with_oscillation_damping_step
+from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.parabolic_equation_stepper import parabolic_equation_step
 from tf_quant_finance.experimental.pde_v2.fd_backward_schemes.weighted_implicit_explicit import weighted_implicit_explicit_step
 from tf_quant_finance.experimental.pde_v2.grids import grids
 
@@ -297,6 +300,396 @@ class ParabolicEquationStepperTest(tf.test.TestCase, parameterized.TestCase):
         upper_boundary_fn=upper_boundary_fn,
         error_tolerance=1e-2)
 
+  def testHeatEquation_WithGridDependentBoundaryConditions(self):
+    """Test solving heat equation with boundary values read from the grid.
+
+    Same setup as in `testHeatEquationWithVariousSchemes`. The boundary
+    callables receive the full coordinate grid, both when the equation is
+    discretized and when the boundary values are computed after a step.
+    """
+
+    def final_cond_fn(x):
+      return math.e * math.sin(x)
+
+    def expected_result_fn(x):
+      return tf.sin(x)
+
+    @dirichlet
+    def lower_boundary_fn(t, x):
+      return tf.exp(t) * tf.sin(x[0][0])
+
+    @dirichlet
+    def upper_boundary_fn(t, x):
+      return tf.exp(t) * tf.sin(x[0][-1])
+
+    grid = grids.uniform_grid(
+        minimums=[-10.5 * math.pi],
+        maximums=[10.5 * math.pi],
+        sizes=[1000],
+        dtype=np.float64)
+    self._testHeatEquation(
+        grid=grid,
+        final_t=1,
+        time_step=0.01,
+        final_cond_fn=final_cond_fn,
+        expected_result_fn=expected_result_fn,
+        one_step_fn=crank_nicolson_step,
+        lower_boundary_fn=lower_boundary_fn,
+        upper_boundary_fn=upper_boundary_fn,
+        error_tolerance=1e-3)
+
+  def testHeatEquation_WithComputeDtype(self):
+    """Test solving heat equation in float32 for a float64 value grid.
+
+    Same setup as in `testHeatEquationWithVariousSchemes`. The boundary
+    callables check that the step is computed in float32.
+    """
+
+    def final_cond_fn(x):
+      return math.e * math.sin(x)
+
+    def expected_result_fn(x):
+      return tf.sin(x)
+
+    @dirichlet
+    def lower_boundary_fn(t, x):
+      self.assertEqual(t.dtype, tf.float32)
+      self.assertEqual(x[0].dtype, tf.float32)
+      return -tf.exp(t)
+
+    @dirichlet
+    def upper_boundary_fn(t, x):
+      self.assertEqual(t.dtype, tf.float32)
+      self.assertEqual(x[0].dtype, tf.float32)
+      return tf.exp(t)
+
+    def one_step_fn(num_steps_performed, **kwargs):
+      del num_steps_performed
+      return parabolic_equation_step(
+          time_marching_scheme=crank_nicolson_scheme,
+          compute_dtype=tf.float32,
+          **kwargs)
+
+    grid = grids.uniform_grid(
+        minimums=[-10.5 * math.pi],
+        maximums=[10.5 * math.pi],
+        sizes=[1000],
+        dtype=np.float64)
+    self._testHeatEquation(
+        grid=grid,
+        final_t=1,
+        time_step=0.01,
+        final_cond_fn=final_cond_fn,
+        expected_result_fn=expected_result_fn,
+        one_step_fn=one_step_fn,
+        lower_boundary_fn=lower_boundary_fn,
+        upper_boundary_fn=upper_boundary_fn,
+        error_tolerance=1e-3)
+
+  def testHeatEquation_WithTimeIndependentCoefficients(self):
+    """Test solving heat equation with coefficients evaluated once per step.
+
+    Same setup as in `testHeatEquationWithVariousSchemes`. The extrapolation
+    scheme constructs the discretized equation at three different times per
+    step, and all of them reuse the same coefficients.
+    """
+
+    def final_cond_fn(x):
+      return math.e * math.sin(x)
+
+    def expected_result_fn(x):
+      return tf.sin(x)
+
+    @dirichlet
+    def lower_boundary_fn(t, x):
+      del x
+      return -tf.exp(t)
+
+    @dirichlet
+    def upper_boundary_fn(t, x):
+      del x
+      return tf.exp(t)
+
+    def one_step_fn(num_steps_performed, **kwargs):
+      del num_steps_performed
+      return parabolic_equation_step(
+          time_marching_scheme=extrapolation_scheme,
+          time_independent_coefficients=True,
+          **kwargs)
+
+    grid = grids.uniform_grid(
+        minimums=[-10.5 * math.pi],
+        maximums=[10.5 * math.pi],
+        sizes=[1000],
+        dtype=np.float32)
+    self._testHeatEquation(
+        grid=grid,
+        final_t=1,
+        time_step=0.01,
+        final_cond_fn=final_cond_fn,
+        expected_result_fn=expected_result_fn,
+        one_step_fn=one_step_fn,
+        lower_boundary_fn=lower_boundary_fn,
+        upper_boundary_fn=upper_boundary_fn,
+        error_tolerance=1e-3)
+
+  @parameterized.named_parameters(
+      ('TimeIndependent', True, 1),
+      ('TimeDependent', False, 3))
+  def testTimeIndependentCoefficients_NumCalls(
+      self, time_independent_coefficients, expected_num_calls):
+    """Tests how many times the coefficients are evaluated in one step.
+
+    The extrapolation scheme constructs the discretized equation three times
+    per step. With `time_independent_coefficients`, the coefficients are
+    evaluated only once. The calls are counted when the step is traced, which
+    happens in both graph and eager mode.
+    """
+    grid = grids.uniform_grid(minimums=[0], maximums=[1], sizes=[11],
+                              dtype=np.float64)
+    num_calls = [0]
+
+    def second_order_coeff_fn(t, x):
+      del t, x
+      num_calls[0] += 1
+      return [[1]]
+
+    @dirichlet
+    def boundary_fn(t, x):
+      del t, x
+      return 0
+
+    parabolic_equation_step(
+        time=0.1,
+        next_time=0,
+        coord_grid=grid,
+        value_grid=tf.sin(grid[0]),
+        boundary_conditions=[(boundary_fn, boundary_fn)],
+        second_order_coeff_fn=second_order_coeff_fn,
+        first_order_coeff_fn=None,
+        zeroth_order_coeff_fn=None,
+        time_marching_scheme=extrapolation_scheme,
+        time_independent_coefficients=time_independent_coefficients,
+        dtype=np.float64)
+    self.assertEqual(num_calls[0], expected_num_calls)
+
+  def testHeatEquation_WithUniformGridSpecialization(self):
+    """Test solving heat equation with the uniform grid specialization.
+
+    Same setup as in `testHeatEquation_WithRobinBoundaryConditions`.
+    """
+
+    def final_cond_fn(x):
+      return math.e * math.sin(x)
+
+    def expected_result_fn(x):
+      return tf.sin(x)
+
+    def lower_boundary_fn(t, x):
+      del x
+      return 2, -1, tf.exp(t)
+
+    def upper_boundary_fn(t, x):
+      del x
+      return 2, 1, 2 * tf.exp(t)
+
+    def one_step_fn(num_steps_performed, **kwargs):
+      del num_steps_performed
+      return parabolic_equation_step(
+          time_marching_scheme=crank_nicolson_scheme,
+          uniform_grid=True,
+          **kwargs)
+
+    grid = grids.uniform_grid(minimums=[0], maximums=[4.5 * math.pi],
+                              sizes=[1000], dtype=np.float64)
+    self._testHeatEquation(
+        grid,
+        final_t=1,
+        time_step=0.01,
+        final_cond_fn=final_cond_fn,
+        expected_result_fn=expected_result_fn,
+        one_step_fn=one_step_fn,
+        lower_boundary_fn=lower_boundary_fn,
+        upper_boundary_fn=upper_boundary_fn,
+        error_tolerance=1e-2)
+
+  def testUniformGridSpecialization_NonUniformGrid(self):
+    """Tests that `uniform_grid=True` raises on a non-uniform grid."""
+    grid = grids.log_uniform_grid(minimums=[0.01], maximums=[1.0], sizes=[10],
+                                  dtype=np.float64)
+
+    def second_order_coeff_fn(t, x):
+      del t, x
+      return [[1]]
+
+    @dirichlet
+    def boundary_fn(t, x):
+      del t, x
+      return 0
+
+    with self.assertRaises(tf.errors.InvalidArgumentError):
+      self.evaluate(
+          parabolic_equation_step(
+              time=0.1,
+              next_time=0,
+              coord_grid=grid,
+              value_grid=tf.ones([10], dtype=np.float64),
+              boundary_conditions=[(boundary_fn, boundary_fn)],
+              second_order_coeff_fn=second_order_coeff_fn,
+              first_order_coeff_fn=None,
+              zeroth_order_coeff_fn=None,
+              time_marching_scheme=crank_nicolson_scheme,
+              uniform_grid=True,
+              dtype=np.float64)[1])
+
+  def testAbsentLowerOrderTerms(self):
+    """Tests the equivalent ways to specify absent lower order terms.
+
+    The first and zeroth order coefficient callables may be None, return None,
+    or return zero coefficients. All of these define the same equation.
+    """
+    grid = grids.uniform_grid(minimums=[0], maximums=[1], sizes=[11],
+                              dtype=np.float64)
+    value_grid = tf.sin(grid[0])
+
+    def second_order_coeff_fn(t, x):
+      del t, x
+      return [[1]]
+
+    @dirichlet
+    def boundary_fn(t, x):
+      del t, x
+      return 0
+
+    def step(first_order_coeff_fn, zeroth_order_coeff_fn):
+      return parabolic_equation_step(
+          time=0.1,
+          next_time=0,
+          coord_grid=grid,
+          value_grid=value_grid,
+          boundary_conditions=[(boundary_fn, boundary_fn)],
+          second_order_coeff_fn=second_order_coeff_fn,
+          first_order_coeff_fn=first_order_coeff_fn,
+          zeroth_order_coeff_fn=zeroth_order_coeff_fn,
+          time_marching_scheme=crank_nicolson_scheme,
+          dtype=np.float64)[1]
+
+    expected = self.evaluate(step(lambda t, x: [0], lambda t, x: 0))
+    self.assertAllClose(expected, self.evaluate(step(None, None)))
+    self.assertAllClose(
+        expected, self.evaluate(step(lambda t, x: [None], lambda t, x: None)))
+
+  def testCoefficientsConstantInSpace(self):
+    """Tests coefficients which are constant along the spatial axis.
+
+    Coefficients of shape `[K, 1]`, also of unknown static shape, should give
+    the same result as the coefficients broadcast to the value grid shape.
+    """
+    grid = grids.uniform_grid(minimums=[0], maximums=[1], sizes=[11],
+                              dtype=np.float64)
+    value_grid = tf.stack([tf.sin(grid[0]), tf.cos(grid[0])])
+    volatility = tf.constant([[0.3], [0.15]], dtype=np.float64)
+    rate = tf.constant([[0.01], [0.03]], dtype=np.float64)
+
+    @dirichlet
+    def boundary_fn(t, x):
+      del t, x
+      return 0
+
+    def step(transform_coeffs):
+      def second_order_coeff_fn(t, x):
+        del t, x
+        return [[transform_coeffs(tf.square(volatility) / 2)]]
+
+      def first_order_coeff_fn(t, x):
+        del t, x
+        return [transform_coeffs(rate)]
+
+      def zeroth_order_coeff_fn(t, x):
+        del t, x
+        return transform_coeffs(-rate)
+
+      return parabolic_equation_step(
+          time=0.1,
+          next_time=0,
+          coord_grid=grid,
+          value_grid=value_grid,
+          boundary_conditions=[(boundary_fn, boundary_fn)],
+          second_order_coeff_fn=second_order_coeff_fn,
+          first_order_coeff_fn=first_order_coeff_fn,
+          zeroth_order_coeff_fn=zeroth_order_coeff_fn,
+          time_marching_scheme=crank_nicolson_scheme,
+          dtype=np.float64)[1]
+
+    expected = self.evaluate(
+        step(lambda coeffs: tf.broadcast_to(coeffs, tf.shape(value_grid))))
+    self.assertAllClose(expected, self.evaluate(step(lambda coeffs: coeffs)))
+    self.assertAllClose(
+        expected,
+        self.evaluate(step(lambda coeffs: tf.compat.v1.placeholder_with_default(
+            coeffs, shape=None))))
+
+  def testPrecomputedCoordGridDeltas(self):
+    """Tests passing the deltas of the coordinate grid to the step."""
+    grid = grids.log_uniform_grid(minimums=[0.01], maximums=[1.0], sizes=[11],
+                                  dtype=np.float64)
+    value_grid = tf.sin(grid[0])
+
+    def second_order_coeff_fn(t, x):
+      del t
+      return [[tf.square(x[0])]]
+
+    def boundary_fn(t, x):
+      del t, x
+      return 2, 1, 1
+
+    def step(coord_grid_deltas):
+      return parabolic_equation_step(
+          time=0.1,
+          next_time=0,
+          coord_grid=grid,
+          value_grid=value_grid,
+          boundary_conditions=[(boundary_fn, boundary_fn)],
+          second_order_coeff_fn=second_order_coeff_fn,
+          first_order_coeff_fn=None,
+          zeroth_order_coeff_fn=None,
+          time_marching_scheme=crank_nicolson_scheme,
+          coord_grid_deltas=coord_grid_deltas,
+          dtype=np.float64)[1]
+
+    expected = self.evaluate(step(None))
+    actual = self.evaluate(step(grid[0][1:] - grid[0][:-1]))
+    self.assertAllClose(expected, actual)
+    with self.assertRaises(ValueError):
+      step(grid[0][2:] - grid[0][:-2])
+
+  def testMismatchedCoefficientDtype(self):
+    """Tests that coefficients of another dtype are not cast silently."""
+    grid = grids.uniform_grid(minimums=[0], maximums=[1], sizes=[11],
+                              dtype=np.float64)
+
+    def second_order_coeff_fn(t, x):
+      del t, x
+      return [[tf.constant(1, dtype=tf.float32)]]
+
+    @dirichlet
+    def boundary_fn(t, x):
+      del t, x
+      return 0
+
+    with self.assertRaises((TypeError, ValueError)):
+      parabolic_equation_step(
+          time=0.1,
+          next_time=0,
+          coord_grid=grid,
+          value_grid=tf.sin(grid[0]),
+          boundary_conditions=[(boundary_fn, boundary_fn)],
+          second_order_coeff_fn=second_order_coeff_fn,
+          first_order_coeff_fn=None,
+          zeroth_order_coeff_fn=None,
+          time_marching_scheme=crank_nicolson_scheme,
+          dtype=np.float64)
+
   def testCrankNicolsonOscillationDamping(self):
     """Tests the Crank-Nicolson oscillation damping.
 
@@ -516,6 +909,74 @@ class ParabolicEquationStepperTest(tf.test.TestCase, parameterized.TestCase):
     call_price = 12.582092
     self.assertAllClose(call_price, value_grid[loc_1], rtol=1e-02, atol=1e-02)
 
+  def testEuropeanCallDynamicVol_WithComputeDtype(self):
+    """Same as `testEuropeanCallDynamicVol`, computed in float32.
+
+    The coefficient and the upper boundary condition depend on the coordinate
+    grid, which the callables receive in `compute_dtype`. The coefficient
+    callable checks that the step is computed in float32.
+    """
+    num_equations = 1  # Number of PDE
+    num_grid_points = 1024  # Number of grid points
+    dtype = np.float64
+    # Build a log-uniform grid
+    s_max = 300.
+    grid = grids.log_uniform_grid(minimums=[0.01], maximums=[s_max],
+                                  sizes=[num_grid_points],
+                                  dtype=dtype)
+    expiry = 1.0
+    strike = 50.0
+
+    # Volatility is of the form  `sigma**2(t) = 1 / 6 + 1 / 2 * t**2`.
+    def second_order_coeff_fn(t, location_grid):
+      self.assertEqual(t.dtype, tf.float32)
+      self.assertEqual(location_grid[0].dtype, tf.float32)
+      return [[(1. / 6 + t**2 / 2) * tf.square(location_grid[0]) / 2]]
+
+    @dirichlet
+    def lower_boundary_fn(t, location_grid):
+      del t, location_grid
+      return 0.0
+
+    @dirichlet
+    def upper_boundary_fn(t, location_grid):
+      del t
+      return location_grid[0][-1] - strike
+
+    def one_step_fn(num_steps_performed, **kwargs):
+      del num_steps_performed
+      return parabolic_equation_step(
+          time_marching_scheme=crank_nicolson_scheme,
+          compute_dtype=tf.float32,
+          **kwargs)
+
+    final_values = tf.nn.relu(grid[0] - strike)
+    # Broadcast to the shape of value dimension, if necessary.
+    final_values += tf.zeros([num_equations, num_grid_points],
+                             dtype=dtype)
+    # Estimate European call option price
+    estimate = fd_solvers.step_back(
+        start_time=expiry,
+        end_time=0,
+        coord_grid=grid,
+        values_grid=final_values,
+        num_steps=None,
+        start_step_count=0,
+        time_step=tf.constant(0.01, dtype=dtype),
+        one_step_fn=one_step_fn,
+        boundary_conditions=[(lower_boundary_fn, upper_boundary_fn)],
+        values_transform_fn=None,
+        second_order_coeff_fn=second_order_coeff_fn,
+        dtype=dtype)[0]
+
+    self.assertEqual(estimate.dtype, dtype)
+    value_grid = self.evaluate(estimate)[0, :]
+    # Grid location corresponding to spot 51.9537332.
+    loc_1 = 849
+    # True call option price (obtained using black_scholes_price function)
+    call_price = 12.582092
+    self.assertAllClose(call_price, value_grid[loc_1], rtol=1e-02, atol=1e-02)
+
 
 if __name__ == '__main__':
   tf.test.main()
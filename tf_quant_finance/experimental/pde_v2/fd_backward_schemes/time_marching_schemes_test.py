@@ -161,6 +161,27 @@ class TimeMarchingSchemeTest(tf.test.TestCase, parameterized.TestCase):
     error_tolerance = 30 * time_step**(accuracy_order + 1)
     self.assertLess(np.max(np.abs(actual - expected)), error_tolerance)
 
+  @parameterized.named_parameters(*parameters)
+  def testBroadcastableDiagonals(self, scheme, accuracy_order):
+    # Tests that the diagonals and the inhomogeneous term may be of a shape
+    # broadcastable with the shape of the batch of solutions.
+    del accuracy_order
+    time_step = 0.0001
+    u = tf.constant([[1, 2, -1, -2], [-1, 3, 2, 1]], dtype=tf.float64)
+    matrix = tf.constant(
+        [[1, -1, 0, 0], [3, 1, 2, 0], [0, -2, 1, 4], [0, 0, 3, 1]],
+        dtype=tf.float64)
+    b = tf.constant([1, -1, -2, 2], dtype=tf.float64)
+
+    tridiag_form = self._convert_to_tridiagonal_format(matrix)
+    actual = self.evaluate(
+        scheme(u, 0, time_step, lambda t: (tridiag_form, b), backwards=True))
+    expected = self.evaluate([
+        scheme(u[i], 0, time_step, lambda t: (tridiag_form, b),
+               backwards=True) for i in range(2)
+    ])
+    self.assertAllClose(actual, expected, rtol=1e-10, atol=1e-10)
+
   def _convert_to_tridiagonal_format(self, matrix):
     matrix_np = self.evaluate(matrix)
     n = matrix_np.shape[0]
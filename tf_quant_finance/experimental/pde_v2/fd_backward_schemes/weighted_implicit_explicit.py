@@ -135,12 +135,22 @@ def weighted_implicit_explicit_scheme(theta):
     """Constructs the time marching scheme."""
     (diag, superdiag, subdiag), inhomog_term = equation_params_fn(
         (t1 + t2) / 2)
+    # Pack the diagonals into a single tensor of shape
+    # `[num_equations, 3, num_grid_points - 2]`, which is the layout
+    # `tf.linalg.tridiagonal_matmul` and `tf.linalg.tridiagonal_solve` work
+    # with. Both substeps then share it. The diagonals only need to be
+    # broadcastable with `value_grid`, so they are broadcast to its shape
+    # first.
+    value_grid_shape = tf.shape(value_grid)
+    diagonals = tf.stack(
+        [tf.broadcast_to(d, value_grid_shape)
+         for d in (superdiag, diag, subdiag)],
+        axis=-2)
 
     if theta == 0:  # fully implicit scheme
       rhs = value_grid
     else:
-      rhs = _weighted_scheme_explicit_part(value_grid,
-                                           diag, superdiag, subdiag,
+      rhs = _weighted_scheme_explicit_part(value_grid, diagonals,
                                            theta, t1, t2, backwards)
 
     if inhomog_term is not None:
@@ -148,30 +158,23 @@ def weighted_implicit_explicit_scheme(theta):
     if theta < 1:
       # Note that if theta is `0`, `rhs` equals to the `value_grid`, so that the
       # fully implicit step is performed.
-      return _weighted_scheme_implicit_part(rhs, diag, superdiag, subdiag,
+      return _weighted_scheme_implicit_part(rhs, diagonals,
                                             theta, t1, t2, backwards)
     return rhs
 
   return _marching_scheme
 
 
-def _weighted_scheme_explicit_part(vec, diag, upper, lower, theta, t1, t2,
-                                   backwards):
+def _weighted_scheme_explicit_part(vec, diagonals, theta, t1, t2, backwards):
   """Explicit step of the weighted implicit-explicit scheme.
 
   Args:
     vec: A real dtype `Tensor` of shape `[num_equations, num_grid_points - 2]`.
       Represents the multiplied vector. "- 2" accounts for the boundary points,
       which the time-marching schemes do not touch.
-    diag: A real dtype `Tensor` of the shape
-      `[num_equations, num_grid_points - 2]`. Represents the main diagonal of
-      a 3-diagonal matrix of the discretized PDE.
-    upper: A real dtype `Tensor` of the shape
-      `[num_equations, num_grid_points - 2]`. Represents the upper diagonal of
-      a 3-diagonal matrix of the discretized PDE.
-    lower:  A real dtype `Tensor` of the shape
-      `[num_equations, num_grid_points - 2]`. Represents the lower diagonal of
-      a 3-diagonal matrix of the discretized PDE.
+    diagonals: A real dtype `Tensor` of the shape
+      `[num_equations, 3, num_grid_points - 2]`. Represents the upper, the main
+      and the lower diagonals of a 3-diagonal matrix of the discretized PDE.
     theta: A Python float between 0 and 1.
     t1: Smaller of the two times defining the step.
     t2: Greater of the two times defining the step.
@@ -181,35 +184,25 @@ def _weighted_scheme_explicit_part(vec, diag, upper, lower, theta, t1, t2,
     A tensor of the same shape and dtype as `vec`.
   """
   multiplier = theta * (t2 - t1) * (-1 if backwards else 1)
-  diag = 1 + multiplier * diag
-  upper = multiplier * upper
-  lower = multiplier * lower
+  diagonals = _scale_and_add_identity(diagonals, multiplier)
 
   # Multiply the tridiagonal matrix by the vector.
-  diag_part = diag * vec
-  zeros = tf.zeros_like(lower[..., :1])
-  lower_part = tf.concat((zeros, lower[..., 1:] * vec[..., :-1]), axis=-1)
-  upper_part = tf.concat((upper[..., :-1] * vec[..., 1:], zeros), axis=-1)
-  return lower_part + diag_part + upper_part
+  return tf.squeeze(
+      tf.linalg.tridiagonal_matmul(diagonals,
+                                   tf.expand_dims(vec, -1),
+                                   diagonals_format='compact'), -1)
 
 
-def _weighted_scheme_implicit_part(vec, diag, upper, lower, theta, t1, t2,
-                                   backwards):
+def _weighted_scheme_implicit_part(vec, diagonals, theta, t1, t2, backwards):
   """Implicit step of the weighted implicit-explicit scheme.
 
   Args:
     vec: A real dtype `Tensor` of shape `[num_equations, num_grid_points - 2]`.
       Represents the multiplied vector. "- 2" accounts for the boundary points,
       which the time-marching schemes do not touch.
-    diag: A real dtype `Tensor` of the shape
-      `[num_equations, num_grid_points - 2]`. Represents the main diagonal of
-      a 3-diagonal matrix of the discretized PDE.
-    upper: A real dtype `Tensor` of the shape
-      `[num_equations, num_grid_points - 2]`. Represents the upper diagonal of
-      a 3-diagonal matrix of the discretized PDE.
-    lower:  A real dtype `Tensor` of the shape
-      `[num_equations, num_grid_points - 2]`. Represents the lower diagonal of
-      a 3-diagonal matrix of the discretized PDE.
+    diagonals: A real dtype `Tensor` of the shape
+      `[num_equations, 3, num_grid_points - 2]`. Represents the upper, the main
+      and the lower diagonals of a 3-diagonal matrix of the discretized PDE.
     theta: A Python float between 0 and 1.
     t1: Smaller of the two times defining the step.
     t2: Greater of the two times defining the step.
@@ -219,11 +212,15 @@ def _weighted_scheme_implicit_part(vec, diag, upper, lower, theta, t1, t2,
     A tensor of the same shape and dtype as `vec`.
   """
   multiplier = (1 - theta) * (t2 - t1) * (1 if backwards else -1)
-  diag = 1 + multiplier * diag
-  upper = multiplier * upper
-  lower = multiplier * lower
-  return tf.linalg.tridiagonal_solve([upper, diag, lower],
+  diagonals = _scale_and_add_identity(diagonals, multiplier)
+  return tf.linalg.tridiagonal_solve(diagonals,
                                      vec,
-                                     diagonals_format='sequence',
+                                     diagonals_format='compact',
                                      transpose_rhs=True,
                                      partial_pivoting=False)
+
+
+def _scale_and_add_identity(diagonals, multiplier):
+  """Computes `1 + multiplier * A` for `A` given by the packed `diagonals`."""
+  return (multiplier * diagonals +
+          tf.constant([[0], [1], [0]], dtype=diagonals.dtype))